@@ -1,14 +1,27 @@
 """Contains Schema element and compilers for foreign table and fdw.
 """
 
+from sqlalchemy.dialects import registry
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.schema import DDLElement, Table
 from sqlalchemy.sql.base import _bind_or_error
+from sqlalchemy.sql.visitors import InternalTraversal
 from sqlalchemy import sql
 from sqlalchemy import types
 from .util import sql_options
 
 
+def register():
+    """Register the pgfdw dialect with SQLAlchemy.
+
+    The dialect is also declared as a ``sqlalchemy.dialects`` entry point,
+    but calling this before :func:`create_engine` avoids scanning installed
+    entry points to find it.
+
+    """
+    registry.register("pgfdw", "sqlalchemy_fdw.dialect", "PGDialectFdw")
+
+
 class ForeignTable(Table):
     """Defines a Foreign Table
 
@@ -81,23 +94,77 @@ class ForeignTable(Table):
         autoload = kwargs.get('autoload', False)
         autoload_with = kwargs.get('autoload_with', None)
         if autoload:
-            if autoload_with:
-                autoload_with.run_callable(
-                    autoload_with.dialect.get_foreign_table_options,
-                    table)
-            else:
-                bind = _bind_or_error(
+            if not autoload_with:
+                autoload_with = _bind_or_error(
                     table.metadata,
                     msg="No engine is bound to this ForeignTable's MetaData. "
                     "Pass an engine to the Table via "
                     "autoload_with=<someengine>, "
                     "or associate the MetaData with an engine via "
                     "metadata.bind=<someengine>")
-                bind.run_callable(
-                    bind.dialect.get_foreign_table_options, table)
+            autoload_with.run_callable(_reflect_foreign_table_options, table)
         return table
 
 
+def _reflect_foreign_table_options(connection, table):
+    """Set the server and options of an autoloaded foreign table.
+
+    The options of every foreign table in the table schema (the default
+    schema for tables without one) are fetched at once and kept on the
+    metadata, keyed by database url and schema, for the next autoloads. Each
+    entry is used by a single autoload. The whole snapshot is dropped once
+    all its entries are used, or as soon as an autoloaded table is missing
+    from it (already autoloaded, created later or outside the default
+    schema), which then queries the database for that table.
+
+    """
+    dialect = connection.dialect
+    schema = table.schema
+    if schema is None:
+        schema = dialect.default_schema_name
+    metadata = table.metadata
+    if not hasattr(metadata, '_foreign_tables_options'):
+        metadata._foreign_tables_options = {}
+    key = (connection.engine.url, schema)
+    schema_options = metadata._foreign_tables_options.pop(key, None)
+    if schema_options is None:
+        schema_options = dialect.get_all_foreign_table_options(
+            connection, schema)
+    elif table.name not in schema_options:
+        # The snapshot may be outdated, let it expire
+        schema_options = {}
+    if table.name in schema_options:
+        table.pgfdw_server, table.pgfdw_options = schema_options.pop(
+            table.name)
+    else:
+        dialect.get_foreign_table_options(connection, table)
+    if schema_options:
+        metadata._foreign_tables_options[key] = schema_options
+
+
+def clear_foreign_tables_options(metadata):
+    """Forget the foreign table options fetched while autoloading.
+
+    The options of foreign tables not autoloaded yet are kept on the metadata
+    until they are used or outdated; call this to drop them, e.g. after
+    altering foreign tables.
+
+    """
+    if hasattr(metadata, '_foreign_tables_options'):
+        del metadata._foreign_tables_options
+
+
+# Server lookups are built once so that their compiled form can be reused by
+# the statement cache.
+_CHECK_SERVER_STMT = sql.text(
+    "select srvname from pg_foreign_server where srvname = :name"
+).bindparams(sql.bindparam('name', type_=types.Unicode))
+
+_FILTER_SERVERS_STMT = sql.text(
+    "select srvname from pg_foreign_server where srvname = ANY(:names)"
+).bindparams(sql.bindparam('names', type_=types.ARRAY(types.Unicode)))
+
+
 class ForeignDataWrapper(DDLElement):
     """Defines a foreign data wrapper server
 
@@ -120,6 +187,13 @@ class ForeignDataWrapper(DDLElement):
 
     """
 
+    inherit_cache = True
+    _cache_key_traversal = [
+        ("name", InternalTraversal.dp_string),
+        ("extension_name", InternalTraversal.dp_string),
+        ("options", InternalTraversal.dp_plain_dict),
+    ]
+
     def __init__(self, name, extension_name, metadata=None, bind=None,
                  options=None):
         self.name = name
@@ -142,15 +216,33 @@ class ForeignDataWrapper(DDLElement):
         """
         if bind is None:
             bind = _bind_or_error(self)
-        bindparams = [
-            sql.bindparam('name', str(self.name), type_=types.Unicode)]
-        cursor = bind.execute(
-            sql.text(
-                "select srvname from pg_foreign_server where srvname = :name"
-            ).bindparams(*bindparams)
-        )
+        cursor = bind.execute(_CHECK_SERVER_STMT, {"name": str(self.name)})
         return bool(cursor.first())
 
+    @classmethod
+    def filter_existing(cls, bind, servers):
+        """Returns the servers that already exist, using a single query.
+
+        Use it instead of ``checkfirst`` when creating many servers::
+
+            existing = ForeignDataWrapper.filter_existing(engine, servers)
+            for server in servers:
+                if server not in existing:
+                    server.create(engine)
+
+        :param: bind: the bind to query
+        :param: servers: an iterable of :class:`ForeignDataWrapper`
+
+        """
+        servers = list(servers)
+        if not servers:
+            return []
+        cursor = bind.execute(
+            _FILTER_SERVERS_STMT,
+            {"names": [str(server.name) for server in servers]})
+        names = {row[0] for row in cursor}
+        return [server for server in servers if str(server.name) in names]
+
     def create(self, bind=None, checkfirst=False):
         """Create the server.
 
@@ -184,12 +276,18 @@ class ForeignDataWrapper(DDLElement):
 
 class CreateForeignDataWrapper(ForeignDataWrapper):
     """The concrete create statement"""
-    pass
+
+    inherit_cache = True
 
 
 class DropForeignDataWrapper(ForeignDataWrapper):
     """The concrete drop statement"""
 
+    inherit_cache = True
+    _cache_key_traversal = ForeignDataWrapper._cache_key_traversal + [
+        ("cascade", InternalTraversal.dp_boolean),
+    ]
+
     def __init__(self, *args, **kwargs):
         self.cascade = kwargs.pop('cascade', False)
         super(DropForeignDataWrapper, self).__init__(*args, **kwargs)
@@ -199,19 +297,17 @@ class DropForeignDataWrapper(ForeignDataWrapper):
 def visit_create_fdw(create, compiler, **kw):
     """Compiler for the create server statement"""
     preparer = compiler.dialect.identifier_preparer
-    statement = (
-        "CREATE server %s foreign data wrapper %s " % (
-            preparer.quote_identifier(create.name),
-            preparer.quote_identifier(create.extension_name)))
-    statement += sql_options(create.options, preparer)
-    return statement
+    name = preparer.quote_identifier(create.name)
+    extension_name = preparer.quote_identifier(create.extension_name)
+    options = sql_options(create.options, preparer)
+    return (
+        f"CREATE server {name} foreign data wrapper {extension_name} "
+        f"{options}")
 
 
 @compiles(DropForeignDataWrapper)
 def visit_drop_fdw(drop, compiler, **kw):
     """Compiler for drop server statement"""
     preparer = compiler.dialect.identifier_preparer
-    statement = "DROP server %s " % (preparer.quote_identifier(drop.name))
-    if drop.cascade:
-        statement += " CASCADE"
-    return statement
+    cascade = "  CASCADE" if drop.cascade else " "
+    return f"DROP server {preparer.quote_identifier(drop.name)}{cascade}"
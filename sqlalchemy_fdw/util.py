@@ -1,11 +1,17 @@
 """Utilities used by both the dialect and the schema objects"""
 
 
+def _format_option(key, value, preparer):
+    """Format a single option, escaping quotes in its value"""
+    value = str(value).replace("'", "''")
+    return f"{preparer.quote_identifier(key)} '{value}'"
+
+
 def sql_options(options, preparer):
     """Format an options clause, if any"""
     if options:
-        return ' options (%s)' % ','.join([
-            "%s '%s'" % (preparer.quote_identifier(key), value)
-            for key, value in list(options.items())
-        ])
+        joined = ','.join([
+            _format_option(key, value, preparer)
+            for key, value in options.items()])
+        return f' options ({joined})'
     return ''
@@ -0,0 +1,42 @@
+"""Tests for foreign tables compilation"""
+
+import pickle
+
+from sqlalchemy import Column, Integer, MetaData
+from sqlalchemy.schema import CreateTable
+
+from sqlalchemy_fdw import ForeignTable, register
+from sqlalchemy_fdw.dialect import PGDialectFdw
+
+register()
+
+
+def make_table():
+    metadata = MetaData()
+    table = ForeignTable(
+        'mytable', metadata, Column('id', Integer),
+        pgfdw_server='myserver', pgfdw_options={'option1': "it's"})
+    return metadata, table
+
+
+def test_create_options():
+    _, table = make_table()
+    statement = str(CreateTable(table).compile(dialect=PGDialectFdw()))
+    assert 'CREATE FOREIGN TABLE mytable' in statement
+    assert 'server myserver  options ("option1" \'it\'\'s\')' in statement
+
+
+def test_create_options_changed():
+    _, table = make_table()
+    dialect = PGDialectFdw()
+    CreateTable(table).compile(dialect=dialect)
+    table.pgfdw_options['option1'] = 'changed'
+    statement = str(CreateTable(table).compile(dialect=dialect))
+    assert 'options ("option1" \'changed\')' in statement
+
+
+def test_pickle_after_compile():
+    metadata, table = make_table()
+    CreateTable(table).compile(dialect=PGDialectFdw())
+    unpickled = pickle.loads(pickle.dumps(metadata))
+    assert isinstance(unpickled.tables['mytable'], ForeignTable)